@@ -4,8 +4,10 @@ Probability Engine - Lead Scoring Algorithm
 Implements the 5-signal scoring model for 3D in-vitro lead qualification.
 """
 
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, NamedTuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+import heapq
 import re
 
 
@@ -30,8 +32,44 @@ HUB_LOCATIONS = [
 
 FUNDED_KEYWORDS = ["series a", "series b", "series c", "series d", "public", "ipo"]
 
+HIGH_TITLE_KEYWORDS = ["director", "vp", "vice president", "head of", "chief"]
 
-@dataclass
+# Company intent points per funding signal; the best matching signal wins
+FUNDING_SCORE = {
+    "series a": 20, "series b": 20,  # Recent funding, looking to grow
+    "series c": 18, "series d": 18,  # Good budget
+    "public": 15,
+    "nih": 10, "grant": 10,          # Grant-funded academics
+    "seed": 5                        # Less budget
+}
+
+
+def keyword_alternation(keywords: List[str]) -> str:
+    """Build a regex alternation matching any of the keywords literally."""
+    return "|".join(re.escape(kw) for kw in keywords)
+
+
+def _compile_keywords(keywords: List[str]) -> "re.Pattern[str]":
+    """Compile a keyword list into a single case-insensitive alternation."""
+    return re.compile(keyword_alternation(keywords), re.IGNORECASE)
+
+
+# Precompiled matchers, built once at import and reused for every lead
+SCIENTIFIC_RE = _compile_keywords(SCIENTIFIC_KEYWORDS)
+HUB_RE = _compile_keywords(HUB_LOCATIONS)
+FUNDING_SCORE_RE = _compile_keywords(list(FUNDING_SCORE))
+
+# Single-pass title matcher for role fit. The lookahead keeps matches
+# zero-width so overlapping keywords are still seen; no keyword in one set
+# is a prefix of a keyword in the other, so one group per position is enough.
+ROLE_FIT_RE = re.compile(
+    "(?=(?:(?P<high>" + keyword_alternation(HIGH_TITLE_KEYWORDS) + ")"
+    "|(?P<role>" + keyword_alternation(ROLE_KEYWORDS) + ")))",
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
 class LeadScore:
     """Represents the multi-dimensional score for a lead."""
     scientific_intent: int = 0
@@ -39,17 +77,17 @@ class LeadScore:
     company_intent: int = 0
     technographic: int = 0
     location: int = 0
+    total: int = field(init=False)
     
-    @property
-    def total(self) -> int:
-        """Calculate total probability score (0-100)."""
-        return min(100, 
+    def __post_init__(self):
+        """Calculate total probability score (0-100) once, at construction."""
+        object.__setattr__(self, "total", min(100, 
             self.scientific_intent + 
             self.role_fit + 
             self.company_intent + 
             self.technographic + 
             self.location
-        )
+        ))
     
     def to_dict(self) -> Dict[str, int]:
         return {
@@ -62,6 +100,17 @@ class LeadScore:
         }
 
 
+class NormalizedLead(NamedTuple):
+    """The scoring-relevant fields of a lead, lower-cased once."""
+    title: str
+    publication: str
+    pub_keywords: str
+    funding: str
+    location: str
+    hq: str
+    uses_invitro: bool
+
+
 def _normalize_text(text: str) -> str:
     """Normalize text for matching."""
     if not text:
@@ -69,55 +118,74 @@ def _normalize_text(text: str) -> str:
     return text.lower().strip()
 
 
-def _has_keywords(text: str, keywords: List[str]) -> bool:
-    """Check if text contains any of the keywords."""
-    text_lower = _normalize_text(text)
-    return any(kw in text_lower for kw in keywords)
+def _has_keywords(text: str, pattern: "re.Pattern[str]") -> bool:
+    """Check if text contains any of the keywords in a precompiled pattern."""
+    if not text:
+        return False
+    return pattern.search(text) is not None
+
+
+def _scan_title(title: str) -> Tuple[bool, bool]:
+    """Return (has_high_title, has_role_keyword) from one pass over title."""
+    has_high_title = has_role_keyword = False
+    for match in ROLE_FIT_RE.finditer(title):
+        if match.group("high") is not None:
+            has_high_title = True
+        else:
+            has_role_keyword = True
+        if has_high_title and has_role_keyword:
+            break
+    return has_high_title, has_role_keyword
+
+
+def _normalize(lead: Dict[str, Any]) -> NormalizedLead:
+    """Extract and normalize the fields the scorers read, in a single pass."""
+    return NormalizedLead(
+        title=_normalize_text(lead.get("title", "")),
+        publication=(lead.get("recent_publication") or "").lower(),
+        pub_keywords=" ".join(lead.get("publication_keywords", [])).lower(),
+        funding=_normalize_text(lead.get("funding_status", "")),
+        location=_normalize_text(lead.get("location", "")),
+        hq=_normalize_text(lead.get("hq_location", "")),
+        uses_invitro=bool(lead.get("uses_invitro", False))
+    )
 
 
-def score_scientific_intent(lead: Dict[str, Any]) -> int:
+def score_scientific_intent(lead: NormalizedLead) -> int:
     """
     Score based on recent DILI/hepatic publications.
     Max score: 40 points
     """
-    publication = lead.get("recent_publication", "")
-    pub_keywords = lead.get("publication_keywords", [])
-    
-    if not publication and not pub_keywords:
+    if not lead.publication and not lead.pub_keywords:
         return 0
     
     # Check publication title
-    if _has_keywords(publication, SCIENTIFIC_KEYWORDS):
+    if _has_keywords(lead.publication, SCIENTIFIC_RE):
         return 40
     
     # Check publication keywords
-    pub_keywords_str = " ".join(pub_keywords).lower()
-    if any(kw in pub_keywords_str for kw in SCIENTIFIC_KEYWORDS):
+    if _has_keywords(lead.pub_keywords, SCIENTIFIC_RE):
         return 40
     
     # Partial credit for any publication
-    if publication:
+    if lead.publication:
         return 20
     
     return 0
 
 
-def score_role_fit(lead: Dict[str, Any]) -> int:
+def score_role_fit(lead: NormalizedLead) -> int:
     """
     Score based on job title relevance.
     Max score: 30 points
     """
-    title = _normalize_text(lead.get("title", ""))
+    title = lead.title
     
     if not title:
         return 0
     
-    # High-value titles
-    high_value = ["director", "vp", "vice president", "head of", "chief"]
-    has_high_title = any(hv in title for hv in high_value)
-    
-    # Role keywords
-    has_role_keyword = _has_keywords(title, ROLE_KEYWORDS)
+    # High-value titles and role keywords
+    has_high_title, has_role_keyword = _scan_title(title)
     
     if has_high_title and has_role_keyword:
         return 30
@@ -131,68 +199,43 @@ def score_role_fit(lead: Dict[str, Any]) -> int:
     return 0
 
 
-def score_company_intent(lead: Dict[str, Any]) -> int:
+def score_company_intent(lead: NormalizedLead) -> int:
     """
     Score based on company funding status.
     Max score: 20 points
     """
-    funding = _normalize_text(lead.get("funding_status", ""))
-    company_type = _normalize_text(lead.get("company_type", ""))
-    
-    # Series A/B = highest intent (recent funding, looking to grow)
-    if "series a" in funding or "series b" in funding:
-        return 20
-    
-    # Series C/D or Public = good budget
-    if "series c" in funding or "series d" in funding:
-        return 18
-    
-    if "public" in funding:
-        return 15
-    
-    # Grant-funded academics
-    if "nih" in funding or "grant" in funding:
-        return 10
-    
-    # Seed stage = less budget
-    if "seed" in funding:
-        return 5
-    
-    return 0
+    return max(
+        (FUNDING_SCORE[m.group(0)] for m in FUNDING_SCORE_RE.finditer(lead.funding)),
+        default=0
+    )
 
 
-def score_technographic(lead: Dict[str, Any]) -> int:
+def score_technographic(lead: NormalizedLead) -> int:
     """
     Score based on current use of in-vitro technology.
     Max score: 15 points
     """
-    uses_invitro = lead.get("uses_invitro", False)
-    pub_keywords = " ".join(lead.get("publication_keywords", [])).lower()
-    
-    if uses_invitro:
+    if lead.uses_invitro:
         # Already using similar tech = high fit
         base_score = 15
     else:
         base_score = 0
     
     # Bonus for NAMs keywords
-    if "nams" in pub_keywords or "new approach" in pub_keywords:
+    if "nams" in lead.pub_keywords or "new approach" in lead.pub_keywords:
         return min(15, base_score + 5)
     
     return base_score
 
 
-def score_location(lead: Dict[str, Any]) -> int:
+def score_location(lead: NormalizedLead) -> int:
     """
     Score based on hub location.
     Max score: 10 points
     """
-    location = _normalize_text(lead.get("location", ""))
-    hq = _normalize_text(lead.get("hq_location", ""))
-    
     # Check both person location and HQ
-    for loc in [location, hq]:
-        if any(hub in loc for hub in HUB_LOCATIONS):
+    for loc in [lead.location, lead.hq]:
+        if _has_keywords(loc, HUB_RE):
             return 10
     
     return 0
@@ -208,6 +251,18 @@ def calculate_lead_score(lead: Dict[str, Any]) -> LeadScore:
     Returns:
         LeadScore object with all dimensions
     """
+    return _score_normalized(_normalize(lead))
+
+
+@lru_cache(maxsize=100_000)
+def _score_normalized(lead: NormalizedLead) -> LeadScore:
+    """
+    Score a normalized lead.
+    
+    Cached so the same person or company seen again (across crawler runs
+    or sources) skips all five scorers; LeadScore is frozen, so sharing the
+    cached instance is safe.
+    """
     return LeadScore(
         scientific_intent=score_scientific_intent(lead),
         role_fit=score_role_fit(lead),
@@ -217,33 +272,37 @@ def calculate_lead_score(lead: Dict[str, Any]) -> LeadScore:
     )
 
 
-def rank_leads(leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def rank_leads(leads: List[Dict[str, Any]], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Score and rank a list of leads by probability.
     
     Args:
         leads: List of lead dictionaries
+        top_k: If set, only return the top_k highest-scoring leads. Uses a
+            partial selection instead of sorting the whole batch.
         
     Returns:
         Sorted list with scores attached
     """
-    scored_leads = []
-    
-    for lead in leads:
-        score = calculate_lead_score(lead)
-        lead_with_score = lead.copy()
-        lead_with_score["probability_score"] = score.total
-        lead_with_score["score_breakdown"] = score.to_dict()
-        scored_leads.append(lead_with_score)
-    
-    # Sort by probability score (descending)
-    scored_leads.sort(key=lambda x: x["probability_score"], reverse=True)
+    scores = [calculate_lead_score(lead) for lead in leads]
+    totals = [score.total for score in scores]
     
-    # Add rank
-    for i, lead in enumerate(scored_leads, 1):
-        lead["rank"] = i
+    # Order by probability score (descending, stable for ties)
+    if top_k is not None:
+        order = heapq.nlargest(top_k, range(len(leads)), key=totals.__getitem__)
+    else:
+        order = sorted(range(len(leads)), key=totals.__getitem__, reverse=True)
     
-    return scored_leads
+    # Build each output dict in one step, for the selected leads only
+    return [
+        {
+            **leads[i],
+            "probability_score": totals[i],
+            "score_breakdown": scores[i].to_dict(),
+            "rank": rank
+        }
+        for rank, i in enumerate(order, 1)
+    ]
 
 
 def get_score_tier(score: int) -> str:
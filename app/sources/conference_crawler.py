@@ -7,9 +7,11 @@ Scrapes attendee, speaker, and exhibitor lists from toxicology conferences.
 - ISSX (International Society for the Study of Xenobiotics)
 """
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+from app.sources.http_session import SESSION
 
 
 # Conference websites to crawl
@@ -35,10 +37,25 @@ CONFERENCES = [
 ]
 
 
+# Case-insensitive class matching for XPath 1.0, which has no lower-case()
+_LOWER_CLASS = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+
+# Name elements inside speaker sections, compiled once and evaluated in C
+SPEAKER_NAME_XPATH = etree.XPath(
+    f"//*[self::div or self::section][contains({_LOWER_CLASS}, 'speaker')]"
+    f"//*[self::h3 or self::h4 or self::strong or self::span][contains({_LOWER_CLASS}, 'name')]"
+)
+
+# Pages arrive already decoded, and lxml rejects str input that carries an
+# XML encoding declaration (common on XHTML pages). Re-encoding to UTF-8
+# and pinning the parser to it ignores any in-page declaration
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
 def fetch_conference_page(url: str) -> str:
     """Fetch conference webpage content."""
     try:
-        response = requests.get(url, timeout=10, headers={
+        response = SESSION.get(url, timeout=10, headers={
             "User-Agent": "Mozilla/5.0 (compatible; Lead-Agent/1.0)"
         })
         response.raise_for_status()
@@ -53,28 +70,24 @@ def extract_speakers_from_html(html: str, conference: Dict) -> List[Dict[str, An
     if not html:
         return []
     
-    soup = BeautifulSoup(html, 'html.parser')
+    try:
+        tree = lxml_html.document_fromstring(html.encode("utf-8"), parser=HTML_PARSER)
+    except etree.ParserError:
+        return []
+    
     speakers = []
     
     # Look for common speaker list patterns
     # This is a simplified version - real implementation would need
     # conference-specific parsing
-    
-    # Try to find speaker sections
-    speaker_sections = soup.find_all(['div', 'section'], class_=lambda x: x and 'speaker' in x.lower() if x else False)
-    
-    for section in speaker_sections:
-        # Look for name elements
-        names = section.find_all(['h3', 'h4', 'strong', 'span'], class_=lambda x: x and 'name' in x.lower() if x else False)
-        
-        for name_elem in names:
-            name = name_elem.get_text().strip()
-            if name and len(name) > 3 and len(name) < 50:
-                speakers.append({
-                    "name": name,
-                    "conference": conference["name"],
-                    "type": "Speaker"
-                })
+    for name_elem in SPEAKER_NAME_XPATH(tree):
+        name = name_elem.text_content().strip()
+        if name and len(name) > 3 and len(name) < 50:
+            speakers.append({
+                "name": name,
+                "conference": conference["name"],
+                "type": "Speaker"
+            })
     
     return speakers
 
@@ -92,9 +105,14 @@ def run_conference_crawler() -> List[Dict[str, Any]]:
     
     for conf in CONFERENCES:
         print(f"   Checking: {conf['name']}")
-        html = fetch_conference_page(conf["url"])
-        speakers = extract_speakers_from_html(html, conf)
-        all_attendees.extend(speakers)
+    
+    # Pages are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=len(CONFERENCES)) as pool:
+        pages = pool.map(fetch_conference_page, [conf["url"] for conf in CONFERENCES])
+        
+        for conf, html in zip(CONFERENCES, pages):
+            speakers = extract_speakers_from_html(html, conf)
+            all_attendees.extend(speakers)
     
     # Since live scraping is limited, supplement with sample data
     if len(all_attendees) < 5:
@@ -6,10 +6,14 @@ Since Crunchbase API requires paid access, we use alternative
 public sources like FierceBiotech RSS feeds.
 """
 
-import requests
-from typing import List, Dict, Any
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator
 from datetime import datetime
-import xml.etree.ElementTree as ET
+from lxml import etree
+
+from app.sources.http_session import SESSION
 
 
 # Public RSS feeds for biotech funding news
@@ -33,6 +37,11 @@ FUNDING_KEYWORDS = [
     "million", "billion", "investors"
 ]
 
+FUNDING_RE = re.compile("|".join(re.escape(kw) for kw in FUNDING_KEYWORDS), re.IGNORECASE)
+
+# Funding amounts like "$50 million", "$50M", "$1.2 billion" or "$1.2B"
+AMOUNT_RE = re.compile(r"\$(\d+(?:\.\d+)?)\s*(million|billion|m|b)\b", re.IGNORECASE)
+
 # Keywords for toxicology/liver-related companies
 TOX_KEYWORDS = [
     "toxicology", "liver", "hepatic", "safety",
@@ -40,66 +49,56 @@ TOX_KEYWORDS = [
 ]
 
 
-def fetch_rss_feed(url: str) -> List[Dict[str, Any]]:
-    """Fetch and parse an RSS feed."""
+def fetch_rss_feed(url: str) -> Iterator[Dict[str, Any]]:
+    """
+    Fetch and parse an RSS feed, yielding items as they are parsed.
+    
+    The response is streamed into lxml's incremental parser, so items can be
+    filtered while the rest of the feed is still downloading and each
+    element is freed once it has been read.
+    """
     try:
-        response = requests.get(url, timeout=10, headers={
+        with SESSION.get(url, timeout=10, stream=True, headers={
             "User-Agent": "Mozilla/5.0 (compatible; Lead-Agent/1.0)"
-        })
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.text)
-        items = []
-        
-        # Handle different RSS formats
-        for item in root.findall(".//item"):
-            title_elem = item.find("title")
-            link_elem = item.find("link")
-            desc_elem = item.find("description")
-            date_elem = item.find("pubDate")
+        }) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True  # Undo gzip/deflate transfer encoding
             
-            items.append({
-                "title": title_elem.text if title_elem is not None else "",
-                "link": link_elem.text if link_elem is not None else "",
-                "description": desc_elem.text if desc_elem is not None else "",
-                "date": date_elem.text if date_elem is not None else ""
-            })
-        
-        return items
+            for _, item in etree.iterparse(response.raw, tag="item"):
+                yield {
+                    "title": item.findtext("title", default=""),
+                    "link": item.findtext("link", default=""),
+                    "description": item.findtext("description", default=""),
+                    "date": item.findtext("pubDate", default="")
+                }
+                
+                # Drop the parsed item and any earlier siblings
+                item.clear()
+                while item.getprevious() is not None:
+                    del item.getparent()[0]
     except Exception as e:
         print(f"Error fetching RSS feed {url}: {e}")
-        return []
 
 
 def is_relevant_funding_news(item: Dict[str, Any]) -> bool:
     """Check if an RSS item is relevant funding news."""
-    text = (item.get("title", "") + " " + item.get("description", "")).lower()
+    text = item.get("title", "") + " " + item.get("description", "")
     
     # Must have funding keywords
-    has_funding = any(kw in text for kw in FUNDING_KEYWORDS)
-    
-    return has_funding
+    return FUNDING_RE.search(text) is not None
 
 
+@lru_cache(maxsize=4096)
 def parse_funding_amount(text: str) -> str:
     """Extract funding amount from text."""
-    import re
+    match = AMOUNT_RE.search(text)
+    if not match:
+        return "Unknown"
     
-    # Look for patterns like "$50 million" or "$50M"
-    patterns = [
-        r'\$(\d+(?:\.\d+)?)\s*(?:million|M)',
-        r'\$(\d+(?:\.\d+)?)\s*(?:billion|B)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            amount = match.group(1)
-            if "billion" in text.lower() or "B" in pattern:
-                return f"${amount}B"
-            return f"${amount}M"
-    
-    return "Unknown"
+    amount, unit = match.group(1), match.group(2).lower()
+    if unit in ("billion", "b"):
+        return f"${amount}B"
+    return f"${amount}M"
 
 
 def extract_company_from_news(item: Dict[str, Any]) -> Dict[str, Any]:
@@ -134,6 +133,15 @@ def extract_company_from_news(item: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def fetch_funding_companies(feed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fetch one feed and extract companies from its funding news items."""
+    return [
+        extract_company_from_news(item)
+        for item in fetch_rss_feed(feed["url"])
+        if is_relevant_funding_news(item)
+    ]
+
+
 def run_crunchbase_crawler() -> List[Dict[str, Any]]:
     """
     Run the funding news crawler.
@@ -147,12 +155,11 @@ def run_crunchbase_crawler() -> List[Dict[str, Any]]:
     
     for feed in RSS_FEEDS:
         print(f"   Fetching: {feed['name']}")
-        items = fetch_rss_feed(feed["url"])
-        
-        for item in items:
-            if is_relevant_funding_news(item):
-                company = extract_company_from_news(item)
-                all_companies.append(company)
+    
+    # Feeds are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=len(RSS_FEEDS)) as pool:
+        for companies in pool.map(fetch_funding_companies, RSS_FEEDS):
+            all_companies.extend(companies)
     
     print(f"   Found {len(all_companies)} funding events")
     
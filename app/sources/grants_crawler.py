@@ -5,14 +5,19 @@ Fetches active grants related to liver toxicology and 3D models
 from NIH RePORTER (publicly accessible).
 """
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from datetime import datetime
 
+from app.sources.http_session import SESSION
+
 
 # NIH RePORTER API endpoint
 NIH_REPORTER_URL = "https://api.reporter.nih.gov/v2/projects/search"
 
+# Grant searches change slowly, so cached results stay fresh for a day
+NIH_CACHE_EXPIRE_SECONDS = 86400
+
 # Search criteria for relevant grants
 GRANT_SEARCH_TERMS = [
     "drug induced liver injury",
@@ -23,13 +28,24 @@ GRANT_SEARCH_TERMS = [
 ]
 
 
-def search_nih_grants(query: str, max_results: int = 25) -> List[Dict[str, Any]]:
+def build_combined_query(terms: List[str]) -> str:
+    """
+    Combine search terms into one advanced RePORTER query.
+    
+    Each term keeps its all-words-must-match meaning and the terms are
+    OR-ed together, e.g. "(3D AND liver AND model) OR (hepatotoxicity)".
+    """
+    return " OR ".join(f"({' AND '.join(term.split())})" for term in terms)
+
+
+def search_nih_grants(query: str, max_results: int = 25, operator: str = "and") -> List[Dict[str, Any]]:
     """
     Search NIH RePORTER for grants matching query.
     
     Args:
         query: Search query
         max_results: Maximum results to return
+        operator: RePORTER text operator ("and", "or" or "advanced")
         
     Returns:
         List of grant dictionaries
@@ -38,7 +54,7 @@ def search_nih_grants(query: str, max_results: int = 25) -> List[Dict[str, Any]]
         "criteria": {
             "use_relevance": True,
             "advanced_text_search": {
-                "operator": "and",
+                "operator": operator,
                 "search_field": "all",
                 "search_text": query
             },
@@ -52,11 +68,12 @@ def search_nih_grants(query: str, max_results: int = 25) -> List[Dict[str, Any]]
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             NIH_REPORTER_URL,
             json=payload,
             headers={"Content-Type": "application/json"},
-            timeout=15
+            timeout=15,
+            expire_after=NIH_CACHE_EXPIRE_SECONDS
         )
         response.raise_for_status()
         
@@ -103,12 +120,14 @@ def parse_grant_to_lead(grant: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def run_grants_crawler(max_per_term: int = 10) -> List[Dict[str, Any]]:
+def run_grants_crawler(max_per_term: int = 10, per_term: bool = False) -> List[Dict[str, Any]]:
     """
     Run the NIH grants crawler.
     
     Args:
         max_per_term: Max results per search term
+        per_term: Issue one search per term instead of a single combined
+            query (useful when results need attributing to a term)
         
     Returns:
         List of leads from grant PIs
@@ -118,18 +137,37 @@ def run_grants_crawler(max_per_term: int = 10) -> List[Dict[str, Any]]:
     all_grants = []
     seen_pis = set()
     
-    for term in GRANT_SEARCH_TERMS:
-        print(f"   Searching: {term}")
-        grants = search_nih_grants(term, max_results=max_per_term)
+    if per_term:
+        for term in GRANT_SEARCH_TERMS:
+            print(f"   Searching: {term}")
         
+        # Search all terms concurrently; results come back in term order
+        with ThreadPoolExecutor(max_workers=len(GRANT_SEARCH_TERMS)) as pool:
+            results = list(pool.map(
+                lambda term: search_nih_grants(term, max_results=max_per_term),
+                GRANT_SEARCH_TERMS
+            ))
+    else:
+        # One round-trip for all terms; RePORTER dedupes overlapping hits
+        print(f"   Searching: {len(GRANT_SEARCH_TERMS)} terms (combined)")
+        results = [search_nih_grants(
+            build_combined_query(GRANT_SEARCH_TERMS),
+            max_results=max_per_term * len(GRANT_SEARCH_TERMS),
+            operator="advanced"
+        )]
+    
+    for grants in results:
         for grant in grants:
-            # Convert to lead
-            lead = parse_grant_to_lead(grant)
+            # Deduplicate by PI before parsing; profile_id is NIH's canonical
+            # PI identifier, so two different "John Smith"s stay separate
+            pi = (grant.get("principal_investigators") or [{}])[0]
+            pi_key = pi.get("profile_id") or (pi.get("first_name"), pi.get("last_name"))
+            if pi_key in seen_pis:
+                continue
+            seen_pis.add(pi_key)
             
-            # Deduplicate by PI name
-            if lead["name"] not in seen_pis:
-                seen_pis.add(lead["name"])
-                all_grants.append(lead)
+            # Convert to lead
+            all_grants.append(parse_grant_to_lead(grant))
     
     print(f"   Found {len(all_grants)} unique grant PIs")
     
@@ -0,0 +1,106 @@
+"""
+Shared HTTP Session
+
+A single cached requests session reused by every crawler. Responses are
+stored in a local SQLite cache and revalidated with ETag/Last-Modified,
+so repeated crawls of unchanged pages cost a 304 instead of a full download.
+Connections are pooled, so TCP/TLS handshakes are paid once per host.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Cache file lives next to the pipeline's other data outputs
+CACHE_PATH = Path(__file__).resolve().parents[2] / "data" / "http_cache"
+
+# Default freshness window when the server sends no Cache-Control headers
+CACHE_EXPIRE_SECONDS = 3600
+
+# Keep-alive connections per host; matches the widest crawler thread pool
+POOL_SIZE = 8
+
+# Retry dropped or refused connections only. Status-code retries are left
+# to callers, which know each API's throttling rules (see ncbi_get).
+CONNECTION_RETRIES = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(),
+    respect_retry_after_header=False
+)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls at least 1/rate seconds apart.
+    
+    Each caller reserves the next free slot under the lock and sleeps
+    outside it, so concurrent workers queue up instead of bursting. The
+    rate adapts AIMD-style: halved when the server pushes back, then
+    raised in small steps back up to the configured ceiling.
+    """
+    
+    def __init__(self, calls_per_second: float, min_calls_per_second: float = 0.5):
+        self.max_rate = calls_per_second
+        self.min_rate = min_calls_per_second
+        self.rate = calls_per_second
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self) -> None:
+        """Block until the caller may make its request."""
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    
+    def back_off(self) -> None:
+        """Multiplicative decrease after a throttled or failed request."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+    
+    def recover(self) -> None:
+        """Additive increase after a successful request."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.1)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Pooled adapter that waits on a RateLimiter before each send.
+    
+    Mounted below the cache layer, so cache hits are never throttled.
+    """
+    
+    def __init__(self, limiter: RateLimiter, **kwargs):
+        kwargs.setdefault("pool_connections", POOL_SIZE)
+        kwargs.setdefault("pool_maxsize", POOL_SIZE)
+        kwargs.setdefault("max_retries", CONNECTION_RETRIES)
+        super().__init__(**kwargs)
+        self.limiter = limiter
+    
+    def send(self, request, **kwargs):
+        self.limiter.wait()
+        return super().send(request, **kwargs)
+
+
+SESSION = requests_cache.CachedSession(
+    str(CACHE_PATH),
+    backend="sqlite",
+    expire_after=CACHE_EXPIRE_SECONDS,
+    cache_control=True,
+    allowable_methods=("GET", "HEAD", "POST")  # NIH RePORTER searches are POSTs
+)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=POOL_SIZE,
+    pool_maxsize=POOL_SIZE,
+    max_retries=CONNECTION_RETRIES
+))
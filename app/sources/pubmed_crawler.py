@@ -5,17 +5,126 @@ Fetches recent publications related to DILI, hepatotoxicity, and 3D models.
 Uses the NCBI E-utilities API (free, no API key required for small queries).
 """
 
+import logging
+import re
 import requests
-from typing import List, Dict, Any, Optional
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, IO, Iterator
 from datetime import datetime, timedelta
 import time
-import xml.etree.ElementTree as ET
+from lxml import etree
+
+from app.scoring.probability_engine import keyword_alternation
+from app.sources.http_session import SESSION, POOL_SIZE, RateLimiter, RateLimitedAdapter
+
+
+logger = logging.getLogger(__name__)
 
 
 # PubMed API base URLs
 ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
 EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
 
+# PMIDs per EFetch request
+EFETCH_BATCH_SIZE = 100
+
+# Search results and article records rarely change within a day, so repeat
+# runs are served from the shared on-disk cache
+NCBI_CACHE_EXPIRE_SECONDS = 86400
+
+# NCBI allows 3 requests/second without an API key; stay just under it so
+# no one-second window ever sees a fourth request
+NCBI_RATE_LIMITER = RateLimiter(2.9)
+
+# Throttle at the transport, so only requests that actually reach NCBI wait
+SESSION.mount("https://eutils.ncbi.nlm.nih.gov/", RateLimitedAdapter(NCBI_RATE_LIMITER))
+
+# Throttled (429) and transient server errors are retried with backoff
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+
+# Upper bound on one retry wait, whatever Retry-After asks for
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+
+def _retry_delay(response: requests.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: Retry-After if given (capped), else exponential."""
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_DELAY_SECONDS)
+    return 0.5 * 2 ** attempt
+
+
+def ncbi_get(url: str, params: Dict[str, Any], timeout: int, stream: bool = False) -> requests.Response:
+    """
+    GET an E-utilities endpoint within NCBI's rate limit.
+    
+    Responses are cached for NCBI_CACHE_EXPIRE_SECONDS. Retries 429/5xx
+    responses, backing the shared limiter off so that concurrent workers
+    slow down too, and eases off proactively when NCBI reports under 10%
+    of its rate-limit quota remaining.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        response = SESSION.get(
+            url,
+            params=params,
+            timeout=timeout,
+            stream=stream,
+            expire_after=NCBI_CACHE_EXPIRE_SECONDS
+        )
+        
+        if response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+            response.close()
+            NCBI_RATE_LIMITER.back_off()
+            time.sleep(_retry_delay(response, attempt))
+            continue
+        
+        response.raise_for_status()
+        
+        # Cache hits never reached NCBI, so they say nothing about its load
+        if getattr(response, "from_cache", False):
+            return response
+        
+        limit = response.headers.get("X-RateLimit-Limit", "")
+        remaining = response.headers.get("X-RateLimit-Remaining", "")
+        if limit.isdigit() and remaining.isdigit() and int(remaining) < int(limit) * 0.1:
+            NCBI_RATE_LIMITER.back_off()
+        else:
+            NCBI_RATE_LIMITER.recover()
+        
+        return response
+
+
+# Keywords used to classify an author's institution, checked in this order
+ACADEMIC_KEYWORDS = ["university", "college", "institute", "school"]
+LARGE_PHARMA_KEYWORDS = ["pfizer", "merck", "novartis", "roche", "gsk", "astrazeneca", "lilly", "abbvie"]
+BIOTECH_KEYWORDS = ["biotech", "therapeutics", "biosciences", "pharmaceuticals"]
+GOVERNMENT_KEYWORDS = ["nih", "fda", "epa", "cdc", "government"]
+
+# Affiliation parts containing these usually name a state or country
+LOCATION_KEYWORDS = ["usa", "uk", "germany", "switzerland", "ma", "ca", "ny"]
+LOCATION_RE = re.compile(keyword_alternation(LOCATION_KEYWORDS), re.IGNORECASE)
+
+# (regex group, label, keywords) in priority order
+COMPANY_TYPES = [
+    ("academic", "Academic", ACADEMIC_KEYWORDS),
+    ("large_pharma", "Large Pharma", LARGE_PHARMA_KEYWORDS),
+    ("biotech", "Biotech", BIOTECH_KEYWORDS),
+    ("government", "Government", GOVERNMENT_KEYWORDS)
+]
+_COMPANY_TYPE_PRIORITY = {group: (rank, label) for rank, (group, label, _) in enumerate(COMPANY_TYPES)}
+
+# All categories in one pass: the zero-width lookahead reports a match at
+# every position a keyword starts and lastgroup names its category. No
+# keyword is a prefix of another category's keyword, so one group per
+# position is enough.
+COMPANY_TYPE_RE = re.compile(
+    "(?=" + "|".join(f"(?P<{group}>{keyword_alternation(kws)})" for group, _, kws in COMPANY_TYPES) + ")",
+    re.IGNORECASE
+)
+
 # Search terms for 3D in-vitro toxicology
 SEARCH_TERMS = [
     '"drug-induced liver injury"',
@@ -29,7 +138,28 @@ SEARCH_TERMS = [
 ]
 
 
-def search_pubmed(query: str, max_results: int = 100, days_back: int = 730) -> List[str]:
+# ESearch parameters shared by every query; only term, limit and dates vary
+ESEARCH_PARAMS = {
+    "db": "pubmed",
+    "retmode": "json",
+    "datetype": "pdat",
+    "sort": "relevance"
+}
+
+
+def pubmed_date_range(days_back: int = 730) -> Tuple[str, str]:
+    """(mindate, maxdate) covering the last N days, in ESearch's format."""
+    end = datetime.now()
+    start = end - timedelta(days=days_back)
+    return start.strftime("%Y/%m/%d"), end.strftime("%Y/%m/%d")
+
+
+def search_pubmed(
+    query: str,
+    max_results: int = 100,
+    days_back: int = 730,
+    date_range: Optional[Tuple[str, str]] = None
+) -> List[str]:
     """
     Search PubMed for articles matching query.
     
@@ -37,33 +167,29 @@ def search_pubmed(query: str, max_results: int = 100, days_back: int = 730) -> L
         query: Search query string
         max_results: Maximum number of results to return
         days_back: Only include papers from last N days (default: 2 years)
+        date_range: Precomputed (mindate, maxdate), overriding days_back;
+            lets a crawl compute its window once for every search
         
     Returns:
         List of PubMed IDs (PMIDs)
     """
-    # Calculate date range
-    end_date = datetime.now().strftime("%Y/%m/%d")
-    start_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y/%m/%d")
+    mindate, maxdate = date_range or pubmed_date_range(days_back)
     
     params = {
-        "db": "pubmed",
+        **ESEARCH_PARAMS,
         "term": query,
         "retmax": max_results,
-        "retmode": "json",
-        "datetype": "pdat",
-        "mindate": start_date,
-        "maxdate": end_date,
-        "sort": "relevance"
+        "mindate": mindate,
+        "maxdate": maxdate
     }
     
     try:
-        response = requests.get(ESEARCH_URL, params=params, timeout=10)
-        response.raise_for_status()
+        response = ncbi_get(ESEARCH_URL, params=params, timeout=10)
         data = response.json()
         
         return data.get("esearchresult", {}).get("idlist", [])
     except Exception as e:
-        print(f"Error searching PubMed: {e}")
+        logger.warning("Error searching PubMed: %s", e)
         return []
 
 
@@ -71,6 +197,10 @@ def fetch_article_details(pmids: List[str]) -> List[Dict[str, Any]]:
     """
     Fetch detailed information for a list of PubMed IDs.
     
+    PMIDs are split into batches of EFETCH_BATCH_SIZE (NCBI recommends at
+    most 200 per request) that are fetched concurrently, within the shared
+    NCBI rate limit, so parsing one batch overlaps downloading the next.
+    
     Args:
         pmids: List of PubMed IDs
         
@@ -80,6 +210,18 @@ def fetch_article_details(pmids: List[str]) -> List[Dict[str, Any]]:
     if not pmids:
         return []
     
+    # Sorted so the same PMID set always yields the same batches, and so the
+    # same cache keys, whatever order the searches returned them in
+    pmids = sorted(pmids)
+    batches = [pmids[i:i + EFETCH_BATCH_SIZE] for i in range(0, len(pmids), EFETCH_BATCH_SIZE)]
+    
+    # No more workers than pooled connections, however many batches there are
+    with ThreadPoolExecutor(max_workers=min(len(batches), POOL_SIZE)) as pool:
+        return [article for batch in pool.map(_fetch_article_batch, batches) for article in batch]
+
+
+def _fetch_article_batch(pmids: List[str]) -> List[Dict[str, Any]]:
+    """Fetch and parse one EFetch batch; a failed batch yields no articles."""
     params = {
         "db": "pubmed",
         "id": ",".join(pmids),
@@ -87,75 +229,99 @@ def fetch_article_details(pmids: List[str]) -> List[Dict[str, Any]]:
     }
     
     try:
-        response = requests.get(EFETCH_URL, params=params, timeout=30)
-        response.raise_for_status()
-        
-        # Parse XML response
-        root = ET.fromstring(response.text)
-        articles = []
-        
-        for article_elem in root.findall(".//PubmedArticle"):
-            article = parse_article_xml(article_elem)
-            if article:
-                articles.append(article)
-        
-        return articles
+        with ncbi_get(EFETCH_URL, params=params, timeout=30, stream=True) as response:
+            response.raw.decode_content = True  # Undo gzip/deflate transfer encoding
+            return list(_parse_efetch(response.raw))
     except Exception as e:
-        print(f"Error fetching article details: {e}")
+        logger.warning("Error fetching article details: %s", e)
         return []
 
 
-def parse_article_xml(article_elem: ET.Element) -> Optional[Dict[str, Any]]:
+def _parse_efetch(source: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parse an EFetch XML stream, yielding one article at a time.
+    
+    Each PubmedArticle is freed as soon as it has been parsed, so memory
+    stays flat however many PMIDs were requested.
+    """
+    for _, article_elem in etree.iterparse(source, tag="PubmedArticle"):
+        article = parse_article_xml(article_elem)
+        
+        # Drop the parsed article and any earlier siblings
+        article_elem.clear()
+        while article_elem.getprevious() is not None:
+            del article_elem.getparent()[0]
+        
+        if article:
+            yield article
+
+
+def _xpath(path: str) -> etree.XPath:
+    """Compile an XPath once; plain str results hold no reference to the tree."""
+    return etree.XPath(path, smart_strings=False)
+
+
+# Abstracts run to several KB; only this prefix is copied out of the tree
+ABSTRACT_MAX_CHARS = 500
+
+# Article field lookups, compiled once at import instead of per find() call.
+# string() yields the field's full text, or "" when the element is missing,
+# so no None checks are needed.
+MEDLINE_XPATH = _xpath("(.//MedlineCitation)[1]")
+PMID_XPATH = _xpath("string((.//PMID)[1])")
+TITLE_XPATH = _xpath("string((.//ArticleTitle)[1])")
+ABSTRACT_XPATH = _xpath(f"substring((.//Abstract/AbstractText)[1], 1, {ABSTRACT_MAX_CHARS})")
+LAST_NAME_XPATH = _xpath("string(LastName[1])")
+FORE_NAME_XPATH = _xpath("string(ForeName[1])")
+AFFILIATION_XPATH = _xpath("string(AffiliationInfo[1]/Affiliation[1])")
+YEAR_XPATH = _xpath("string((.//PubDate)[1]/Year[1])")
+JOURNAL_XPATH = _xpath("string((.//Journal/Title)[1])")
+KEYWORD_XPATH = _xpath(".//Keyword/text()[1]")
+
+
+def parse_article_xml(article_elem: etree._Element) -> Optional[Dict[str, Any]]:
     """Parse a single article from PubMed XML."""
     try:
-        medline = article_elem.find(".//MedlineCitation")
-        if medline is None:
+        medline = MEDLINE_XPATH(article_elem)
+        if not medline:
             return None
+        medline = medline[0]
         
         # Extract PMID
-        pmid_elem = medline.find(".//PMID")
-        pmid = pmid_elem.text if pmid_elem is not None else None
+        pmid = PMID_XPATH(medline) or None
         
         # Extract title
-        title_elem = medline.find(".//ArticleTitle")
-        title = title_elem.text if title_elem is not None else ""
+        title = TITLE_XPATH(medline)
         
         # Extract abstract
-        abstract_elem = medline.find(".//Abstract/AbstractText")
-        abstract = abstract_elem.text if abstract_elem is not None else ""
+        abstract = ABSTRACT_XPATH(medline)
         
-        # Extract authors
+        # Extract authors (streamed; lookup bound to a local for long lists)
         authors = []
-        for author_elem in medline.findall(".//Author"):
-            last_name = author_elem.find("LastName")
-            first_name = author_elem.find("ForeName")
-            affiliation = author_elem.find(".//Affiliation")
+        add_author = authors.append
+        for author_elem in medline.iterfind(".//Author"):
+            last_name = LAST_NAME_XPATH(author_elem)
             
-            if last_name is not None:
-                author = {
-                    "name": f"{first_name.text if first_name is not None else ''} {last_name.text}".strip(),
-                    "affiliation": affiliation.text if affiliation is not None else ""
-                }
-                authors.append(author)
+            if last_name:
+                add_author({
+                    "name": f"{FORE_NAME_XPATH(author_elem)} {last_name}".strip(),
+                    "affiliation": AFFILIATION_XPATH(author_elem)
+                })
         
         # Extract publication date
-        pub_date = medline.find(".//PubDate")
-        year = pub_date.find("Year").text if pub_date is not None and pub_date.find("Year") is not None else ""
+        year = YEAR_XPATH(medline)
         
         # Extract journal
-        journal_elem = medline.find(".//Journal/Title")
-        journal = journal_elem.text if journal_elem is not None else ""
+        journal = JOURNAL_XPATH(medline)
         
-        # Extract keywords
-        keywords = []
-        for keyword_elem in medline.findall(".//Keyword"):
-            if keyword_elem.text:
-                keywords.append(keyword_elem.text)
+        # Extract keywords (interned: the same MeSH-style terms recur across
+        # most articles, so leads share one string object per keyword)
+        keywords = [sys.intern(keyword) for keyword in KEYWORD_XPATH(medline)]
         
         return {
             "pmid": pmid,
             "title": title,
-            "abstract": abstract[:500] if abstract else "",  # Truncate long abstracts
+            "abstract": abstract,
             "authors": authors,
             "year": year,
             "journal": journal,
@@ -163,7 +329,8 @@ def parse_article_xml(article_elem: ET.Element) -> Optional[Dict[str, Any]]:
             "source": "pubmed"
         }
     except Exception as e:
-        print(f"Error parsing article: {e}")
+        # Per-article, so a malformed batch would otherwise flood the output
+        logger.debug("Error parsing article: %s", e)
         return None
 
 
@@ -214,6 +381,9 @@ def extract_leads_from_publications(articles: List[Dict[str, Any]]) -> List[Dict
     return leads
 
 
+# Authors from the same lab or university share affiliation strings, so
+# both helpers below are memoized
+@lru_cache(maxsize=4096)
 def parse_affiliation(affiliation: str) -> tuple:
     """Parse affiliation string to extract company and location."""
     if not affiliation:
@@ -230,67 +400,94 @@ def parse_affiliation(affiliation: str) -> tuple:
     for part in reversed(parts):
         part = part.strip()
         # Check for common location patterns
-        if any(loc in part.lower() for loc in ["usa", "uk", "germany", "switzerland", "ma", "ca", "ny"]):
+        if LOCATION_RE.search(part):
             location = part
             break
     
     return company[:50], location[:30]  # Truncate for display
 
 
+@lru_cache(maxsize=4096)
 def classify_company_type(company: str, affiliation: str) -> str:
     """Classify the company/institution type."""
-    text = (company + " " + affiliation).lower()
+    text = company + " " + affiliation
     
-    if any(uni in text for uni in ["university", "college", "institute", "school"]):
-        return "Academic"
-    elif any(pharma in text for pharma in ["pfizer", "merck", "novartis", "roche", "gsk", "astrazeneca", "lilly", "abbvie"]):
-        return "Large Pharma"
-    elif any(bio in text for bio in ["biotech", "therapeutics", "biosciences", "pharmaceuticals"]):
-        return "Biotech"
-    elif any(gov in text for gov in ["nih", "fda", "epa", "cdc", "government"]):
-        return "Government"
-    else:
-        return "Other"
+    # Highest-priority category found anywhere in the text wins
+    best = None
+    for match in COMPANY_TYPE_RE.finditer(text):
+        priority = _COMPANY_TYPE_PRIORITY[match.lastgroup]
+        if best is None or priority < best:
+            best = priority
+            if priority[0] == 0:
+                break
+    
+    return best[1] if best else "Other"
+
 
+def or_pubmed_terms(terms: List[str]) -> str:
+    """OR PubMed query expressions together, each used verbatim, e.g. '(a) OR (b AND c)'."""
+    return " OR ".join(f"({term})" for term in terms)
 
-def run_pubmed_crawler(max_per_term: int = 20) -> List[Dict[str, Any]]:
+
+def run_pubmed_crawler(max_per_term: int = 20, per_term: bool = False) -> List[Dict[str, Any]]:
     """
     Run the full PubMed crawl.
     
     Args:
         max_per_term: Max results per search term
+        per_term: Issue one ESearch per term instead of a single combined
+            query (useful when results need attributing to a term)
         
     Returns:
         List of leads extracted from publications
     """
-    print("🔬 Starting PubMed Crawler...")
+    logger.info("🔬 Starting PubMed Crawler...")
     
     all_pmids = set()
     
-    for term in SEARCH_TERMS:
-        print(f"   Searching: {term}")
-        pmids = search_pubmed(term, max_results=max_per_term)
-        all_pmids.update(pmids)
-        time.sleep(0.5)  # Be nice to NCBI servers
+    # One search window for the whole crawl
+    date_range = pubmed_date_range()
     
-    print(f"   Found {len(all_pmids)} unique articles")
+    if per_term:
+        for term in SEARCH_TERMS:
+            logger.info("   Searching: %s", term)
+        
+        # Searches run concurrently; NCBI_RATE_LIMITER keeps them within quota
+        with ThreadPoolExecutor(max_workers=len(SEARCH_TERMS)) as pool:
+            for pmids in pool.map(
+                lambda term: search_pubmed(term, max_results=max_per_term, date_range=date_range),
+                SEARCH_TERMS
+            ):
+                all_pmids.update(pmids)
+    else:
+        # One round-trip for all terms; NCBI dedupes overlapping hits
+        logger.info("   Searching: %d terms (combined)", len(SEARCH_TERMS))
+        all_pmids.update(search_pubmed(
+            or_pubmed_terms(SEARCH_TERMS),
+            max_results=max_per_term * len(SEARCH_TERMS),
+            date_range=date_range
+        ))
+    
+    logger.info("   Found %d unique articles", len(all_pmids))
     
     if not all_pmids:
         return []
     
     # Fetch details
-    print("   Fetching article details...")
+    logger.info("   Fetching article details...")
     articles = fetch_article_details(list(all_pmids))
-    print(f"   Retrieved {len(articles)} articles")
+    logger.info("   Retrieved %d articles", len(articles))
     
     # Convert to leads
     leads = extract_leads_from_publications(articles)
-    print(f"   Extracted {len(leads)} potential leads")
+    logger.info("   Extracted %d potential leads", len(leads))
     
     return leads
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     leads = run_pubmed_crawler(max_per_term=10)
     
     print("\nSample Leads Found:")
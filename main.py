@@ -8,11 +8,12 @@ Coordinates the lead generation pipeline:
 4. Output to dashboard/exports
 """
 
-import json
 import os
 from pathlib import Path
 from datetime import datetime
 
+import orjson
+
 # Add app to path
 import sys
 sys.path.insert(0, str(Path(__file__).parent))
@@ -24,8 +25,8 @@ def load_sample_data():
     """Load sample leads from JSON file."""
     data_path = Path(__file__).parent / "data" / "sample_leads.json"
     
-    with open(data_path, "r") as f:
-        return json.load(f)
+    with open(data_path, "rb") as f:
+        return orjson.loads(f.read())
 
 
 def run_pipeline(test_mode=False):
@@ -64,14 +65,22 @@ def run_pipeline(test_mode=False):
     print("\n📈 STEP 3: Pipeline Statistics")
     print("-" * 40)
     
-    scores = [l["probability_score"] for l in scored_leads]
-    hot_leads = sum(1 for s in scores if s >= 80)
-    high_priority = sum(1 for s in scores if 60 <= s < 80)
-    medium = sum(1 for s in scores if 40 <= s < 60)
-    low = sum(1 for s in scores if s < 40)
+    # Tally every tier and the score total in one pass
+    score_sum = hot_leads = high_priority = medium = low = 0
+    for l in scored_leads:
+        s = l["probability_score"]
+        score_sum += s
+        if s >= 80:
+            hot_leads += 1
+        elif s >= 60:
+            high_priority += 1
+        elif s >= 40:
+            medium += 1
+        else:
+            low += 1
     
     print(f"   Total Leads:     {len(scored_leads)}")
-    print(f"   Average Score:   {sum(scores)/len(scores):.1f}")
+    print(f"   Average Score:   {score_sum/len(scored_leads):.1f}")
     print(f"   Hot Leads (80+): {hot_leads}")
     print(f"   High (60-79):    {high_priority}")
     print(f"   Medium (40-59):  {medium}")
@@ -82,8 +91,8 @@ def run_pipeline(test_mode=False):
     print("-" * 40)
     
     output_path = Path(__file__).parent / "data" / "scored_leads.json"
-    with open(output_path, "w") as f:
-        json.dump(scored_leads, f, indent=2)
+    with open(output_path, "wb") as f:
+        f.write(orjson.dumps(scored_leads, option=orjson.OPT_INDENT_2))
     print(f"   Saved to: {output_path}")
     
     print("\n" + "="*60)
@@ -9,16 +9,22 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json
+import orjson
 import os
+import re
 import sys
 import io
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Add app to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+from app.scoring.probability_engine import keyword_alternation
+from app.sources.http_session import SESSION
+
 # Page config - must be first Streamlit command
 st.set_page_config(
     page_title="BioLeads AI - Lead Scoring",
@@ -27,169 +33,55 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for premium dark mode UI
-st.markdown("""
-<style>
-    /* Main app styling */
-    .stApp {
-        background: linear-gradient(135deg, #0f0f23 0%, #1a1a2e 50%, #16213e 100%);
-    }
-    
-    /* Header styling */
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-size: 2.5rem;
-        font-weight: 800;
-        margin-bottom: 0.5rem;
-    }
-    
-    .sub-header {
-        color: #94a3b8;
-        font-size: 1.1rem;
-        margin-bottom: 2rem;
-    }
-    
-    /* Metric cards with glassmorphism */
-    .metric-card {
-        background: rgba(255, 255, 255, 0.05);
-        backdrop-filter: blur(10px);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 16px;
-        padding: 1.5rem;
-        text-align: center;
-        transition: transform 0.3s ease, box-shadow 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 20px 40px rgba(102, 126, 234, 0.2);
-    }
-    
-    .metric-value {
-        font-size: 2.5rem;
-        font-weight: 700;
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-    }
-    
-    .metric-label {
-        color: #94a3b8;
-        font-size: 0.9rem;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        margin-top: 0.5rem;
-    }
-    
-    /* Score badges */
-    .score-hot {
-        background: linear-gradient(90deg, #f43f5e 0%, #ec4899 100%);
-        color: white;
-        padding: 4px 12px;
-        border-radius: 20px;
-        font-weight: 600;
-        font-size: 0.85rem;
-    }
-    
-    .score-high {
-        background: linear-gradient(90deg, #f59e0b 0%, #fbbf24 100%);
-        color: #1a1a2e;
-        padding: 4px 12px;
-        border-radius: 20px;
-        font-weight: 600;
-        font-size: 0.85rem;
-    }
-    
-    .score-medium {
-        background: linear-gradient(90deg, #3b82f6 0%, #60a5fa 100%);
-        color: white;
-        padding: 4px 12px;
-        border-radius: 20px;
-        font-weight: 600;
-        font-size: 0.85rem;
-    }
-    
-    .score-low {
-        background: rgba(148, 163, 184, 0.2);
-        color: #94a3b8;
-        padding: 4px 12px;
-        border-radius: 20px;
-        font-weight: 600;
-        font-size: 0.85rem;
-    }
-    
-    /* Sidebar styling */
-    .css-1d391kg {
-        background: rgba(15, 15, 35, 0.95);
-    }
-    
-    /* Table hover effect */
-    .dataframe tbody tr:hover {
-        background: rgba(102, 126, 234, 0.1) !important;
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.5rem 1.5rem;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: scale(1.05);
-        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
-    }
-    
-    /* Slider styling */
-    .stSlider > div > div > div {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    /* Info boxes */
-    .info-box {
-        background: rgba(102, 126, 234, 0.1);
-        border-left: 4px solid #667eea;
-        padding: 1rem;
-        border-radius: 0 8px 8px 0;
-        margin: 1rem 0;
-    }
-    
-    /* Live indicator */
-    .live-indicator {
-        display: inline-block;
-        width: 8px;
-        height: 8px;
-        background: #22c55e;
-        border-radius: 50%;
-        margin-right: 8px;
-        animation: pulse 2s infinite;
-    }
-    
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.5; }
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for premium dark mode UI, kept in assets/style.css
+STYLE_PATH = Path(__file__).parent / "assets" / "style.css"
+
+
+@st.cache_resource
+def load_css():
+    """Stylesheet markup, read from disk once per server process."""
+    return f"<style>\n{STYLE_PATH.read_text(encoding='utf-8')}</style>"
+
+
+# Injected on every run: Streamlit drops elements a rerun doesn't emit
+st.markdown(load_css(), unsafe_allow_html=True)
+
+
+# Metric card markup, filled in per rerun with str.format
+METRIC_CARD_HTML = """
+        <div class="metric-card">
+            <div class="metric-value">{value}</div>
+            <div class="metric-label">{label}</div>
+        </div>
+        """
 
 
 # === DATA SOURCES ===
 
+# API responses persist in the shared on-disk HTTP cache for a day, so
+# server restarts don't re-query PubMed and NIH
+API_CACHE_EXPIRE_SECONDS = 86400
+
+# Columns of a fetched lead. Fetchers return one list per field: values
+# that vary per lead are appended as they are parsed, fields constant
+# across a source are filled once per column, and the DataFrame is built
+# from the lists directly
+LEAD_FIELDS = (
+    "name", "title", "company", "company_type", "location", "hq_location",
+    "email", "linkedin", "funding_status", "recent_publication",
+    "publication_keywords", "uses_invitro", "source"
+)
+
+
+def empty_lead_columns():
+    """An empty list per lead field."""
+    return {field: [] for field in LEAD_FIELDS}
+
+
 @st.cache_data(ttl=3600)  # Cache for 1 hour
-def fetch_pubmed_leads(max_results=30):
-    """Fetch real leads from PubMed."""
-    import requests
-    import xml.etree.ElementTree as ET
+def fetch_pubmed_leads(max_results=30, _refresh=False):
+    """Fetch real leads from PubMed as per-field lists (_refresh bypasses the HTTP cache)."""
+    from lxml import etree
     
     ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
     EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
@@ -199,79 +91,84 @@ def fetch_pubmed_leads(max_results=30):
     
     try:
         # Search PubMed
-        search_resp = requests.get(ESEARCH_URL, params={
+        search_resp = SESSION.get(ESEARCH_URL, params={
             "db": "pubmed",
             "term": search_query,
             "retmax": max_results,
             "retmode": "json",
             "sort": "relevance"
-        }, timeout=10)
+        }, timeout=10, expire_after=API_CACHE_EXPIRE_SECONDS, force_refresh=_refresh)
         
-        pmids = search_resp.json().get("esearchresult", {}).get("idlist", [])
+        pmids = orjson.loads(search_resp.content).get("esearchresult", {}).get("idlist", [])
         
         if not pmids:
-            return []
+            return empty_lead_columns()
         
-        # Fetch details
-        fetch_resp = requests.get(EFETCH_URL, params={
+        # Fetch details (IDs in a POST body, so the URL stays short however
+        # many PMIDs are requested)
+        fetch_resp = SESSION.post(EFETCH_URL, data={
             "db": "pubmed",
             "id": ",".join(pmids[:20]),
             "retmode": "xml"
-        }, timeout=15)
+        }, timeout=15, expire_after=API_CACHE_EXPIRE_SECONDS, force_refresh=_refresh)
         
-        root = ET.fromstring(fetch_resp.text)
-        leads = []
+        names, companies, company_types, locations, publications = [], [], [], [], []
         seen_names = set()
         
-        for article in root.findall(".//PubmedArticle"):
+        # Stream articles out of the response, freeing each once it is read
+        for _, article in etree.iterparse(io.BytesIO(fetch_resp.content), tag="PubmedArticle"):
             # Get title
-            title_elem = article.find(".//ArticleTitle")
-            title = title_elem.text if title_elem is not None else ""
+            title = article.findtext(".//ArticleTitle", "")
             
             # Get authors
-            for author in article.findall(".//Author"):
-                last_name = author.find("LastName")
-                first_name = author.find("ForeName")
-                affiliation = author.find(".//Affiliation")
+            for author in article.iterfind(".//Author"):
+                last_name = author.findtext("LastName")
                 
                 if last_name is not None:
-                    name = f"Dr. {first_name.text if first_name else ''} {last_name.text}".strip()
+                    name = f"Dr. {author.findtext('ForeName', '')} {last_name}".strip()
                     
                     if name in seen_names:
                         continue
                     seen_names.add(name)
                     
-                    aff_text = affiliation.text if affiliation is not None else ""
+                    aff_text = author.findtext(".//Affiliation", "")
                     company, location = parse_affiliation(aff_text)
                     
-                    leads.append({
-                        "name": name,
-                        "title": "Research Author",
-                        "company": company,
-                        "company_type": "Academic" if any(x in company.lower() for x in ["university", "institute", "college"]) else "Industry",
-                        "location": location,
-                        "hq_location": location,
-                        "email": "",
-                        "linkedin": "",
-                        "funding_status": "Unknown",
-                        "recent_publication": f"{title[:80]}..." if len(title) > 80 else title,
-                        "publication_keywords": ["DILI", "hepatotoxicity"],
-                        "uses_invitro": True,
-                        "source": "PubMed"
-                    })
+                    names.append(name)
+                    companies.append(company)
+                    company_types.append("Academic" if any(x in company.lower() for x in ["university", "institute", "college"]) else "Industry")
+                    locations.append(location)
+                    publications.append(f"{title[:80]}..." if len(title) > 80 else title)
                     break  # One author per paper
+            
+            article.clear()
+            while article.getprevious() is not None:
+                del article.getparent()[0]
         
-        return leads
+        n = len(names)
+        return {
+            "name": names,
+            "title": ["Research Author"] * n,
+            "company": companies,
+            "company_type": company_types,
+            "location": locations,
+            "hq_location": list(locations),
+            "email": [""] * n,
+            "linkedin": [""] * n,
+            "funding_status": ["Unknown"] * n,
+            "recent_publication": publications,
+            "publication_keywords": [["DILI", "hepatotoxicity"] for _ in range(n)],
+            "uses_invitro": [True] * n,
+            "source": ["PubMed"] * n
+        }
     except Exception as e:
         st.warning(f"PubMed fetch error: {e}")
-        return []
+        return empty_lead_columns()
 
 
 @st.cache_data(ttl=3600)
-def fetch_nih_grants_leads(max_results=20):
-    """Fetch real leads from NIH RePORTER."""
-    import requests
-    
+def fetch_nih_grants_leads(max_results=20, _refresh=False):
+    """Fetch real leads from NIH RePORTER as per-field lists (_refresh bypasses the HTTP cache)."""
     NIH_URL = "https://api.reporter.nih.gov/v2/projects/search"
     
     try:
@@ -289,11 +186,16 @@ def fetch_nih_grants_leads(max_results=20):
             "limit": max_results
         }
         
-        resp = requests.post(NIH_URL, json=payload, timeout=15)
-        results = resp.json().get("results", [])
+        resp = SESSION.post(
+            NIH_URL,
+            json=payload,
+            timeout=15,
+            expire_after=API_CACHE_EXPIRE_SECONDS,
+            force_refresh=_refresh
+        )
+        results = orjson.loads(resp.content).get("results", [])
         
-        leads = []
-        seen_names = set()
+        names, companies, locations, funding, publications = [], [], [], [], []
         
         for grant in results:
             pis = grant.get("principal_investigators", [])
@@ -303,33 +205,51 @@ def fetch_nih_grants_leads(max_results=20):
             pi = pis[0]
             name = f"Dr. {pi.get('first_name', '')} {pi.get('last_name', '')}".strip()
             
-            if name in seen_names or name == "Dr. ":
+            if name == "Dr. ":
                 continue
-            seen_names.add(name)
             
             org = grant.get("organization", {})
             award = grant.get("award_amount", 0)
             
-            leads.append({
-                "name": name,
-                "title": "Principal Investigator",
-                "company": org.get("org_name", "Unknown"),
-                "company_type": "Academic",
-                "location": f"{org.get('org_city', '')}, {org.get('org_state', '')}",
-                "hq_location": f"{org.get('org_city', '')}, {org.get('org_state', '')}",
-                "email": "",
-                "linkedin": "",
-                "funding_status": f"NIH Grant (${award:,})" if award else "NIH Grant",
-                "recent_publication": grant.get("project_title", "")[:80],
-                "publication_keywords": ["NIH", "grant"],
-                "uses_invitro": True,
-                "source": "NIH RePORTER"
-            })
+            names.append(name)
+            companies.append(org.get("org_name", "Unknown"))
+            locations.append(f"{org.get('org_city', '')}, {org.get('org_state', '')}")
+            funding.append(f"NIH Grant (${award:,})" if award else "NIH Grant")
+            publications.append(grant.get("project_title", "")[:80])
         
-        return leads
+        n = len(names)
+        return {
+            "name": names,
+            "title": ["Principal Investigator"] * n,
+            "company": companies,
+            "company_type": ["Academic"] * n,
+            "location": locations,
+            "hq_location": list(locations),
+            "email": [""] * n,
+            "linkedin": [""] * n,
+            "funding_status": funding,
+            "recent_publication": publications,
+            "publication_keywords": [["NIH", "grant"] for _ in range(n)],
+            "uses_invitro": [True] * n,
+            "source": ["NIH RePORTER"] * n
+        }
     except Exception as e:
         st.warning(f"NIH fetch error: {e}")
-        return []
+        return empty_lead_columns()
+
+
+def fetch_all_leads_parallel(max_pubmed=30, max_nih=20, refresh=False):
+    """Fetch PubMed and NIH leads concurrently."""
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=2, initializer=add_script_run_ctx, initargs=(None, ctx)) as pool:
+        pubmed_future = pool.submit(fetch_pubmed_leads, max_pubmed, refresh)
+        nih_future = pool.submit(fetch_nih_grants_leads, max_nih, refresh)
+        return pubmed_future.result(), nih_future.result()
+
+
+# Country/state hints marking the location part of an affiliation, as
+# one alternation (substring matches, like the original keyword list)
+LOCATION_HINT_RE = re.compile("usa|uk|germany|ma|ca|ny|tx")
 
 
 def parse_affiliation(aff: str):
@@ -343,7 +263,7 @@ def parse_affiliation(aff: str):
     location = "Unknown"
     for part in reversed(parts):
         part = part.strip()
-        if any(x in part.lower() for x in ["usa", "uk", "germany", "ma", "ca", "ny", "tx"]):
+        if LOCATION_HINT_RE.search(part.lower()):
             location = part[:30]
             break
     
@@ -355,61 +275,166 @@ def load_sample_leads():
     data_path = Path(__file__).parent / "data" / "sample_leads.json"
     
     if data_path.exists():
-        with open(data_path, "r") as f:
-            return json.load(f)
+        with open(data_path, "rb") as f:
+            return orjson.loads(f.read())
     return []
 
 
-def calculate_score(lead):
-    """Calculate probability score for a lead."""
-    score = 0
-    
-    # Scientific Intent (+40)
-    publication = lead.get("recent_publication", "") or ""
-    scientific_keywords = ["dili", "liver", "hepatic", "hepato", "3d", "organoid", "spheroid", "toxicity"]
-    if any(kw in publication.lower() for kw in scientific_keywords):
-        score += 40
-    
-    # Role Fit (+30)
-    title = lead.get("title", "").lower()
-    role_keywords = ["toxicology", "toxicologist", "safety", "preclinical", "hepatic", "director", "vp", "head", "principal"]
-    if any(kw in title for kw in role_keywords):
-        score += 30
-    
-    # Company Intent (+20)
-    funding = lead.get("funding_status", "").lower()
-    if "series a" in funding or "series b" in funding:
-        score += 20
-    elif "series c" in funding or "public" in funding or "nih" in funding:
-        score += 15
-    
-    # Technographic (+15)
-    if lead.get("uses_invitro", False):
-        score += 15
-    
-    # Location (+10)
-    location = (lead.get("location", "") + " " + lead.get("hq_location", "")).lower()
-    hub_locations = ["boston", "cambridge", "san francisco", "bay area", "basel", "london", "uk", "palo alto"]
-    if any(hub in location for hub in hub_locations):
-        score += 10
-    
-    return min(score, 100)
-
-
-def get_score_tier(score):
-    """Get tier label for a score."""
-    if score >= 80:
-        return "🔥 Hot Lead"
-    elif score >= 60:
-        return "⭐ High Priority"
-    elif score >= 40:
-        return "📊 Medium"
-    elif score >= 20:
-        return "📉 Low"
+# Scoring model signals
+SCIENTIFIC_KEYWORDS = ["dili", "liver", "hepatic", "hepato", "3d", "organoid", "spheroid", "toxicity"]
+ROLE_KEYWORDS = ["toxicology", "toxicologist", "safety", "preclinical", "hepatic", "director", "vp", "head", "principal"]
+HUB_LOCATIONS = ["boston", "cambridge", "san francisco", "bay area", "basel", "london", "uk", "palo alto"]
+SERIES_AB_KEYWORDS = ["series a", "series b"]
+SERIES_CX_KEYWORDS = ["series c", "public", "nih"]
+
+
+# Each keyword list as one compiled alternation: a single scan per text
+# instead of one substring test per keyword (inputs are lowercased first)
+SCIENTIFIC_RE = re.compile(keyword_alternation(SCIENTIFIC_KEYWORDS))
+ROLE_RE = re.compile(keyword_alternation(ROLE_KEYWORDS))
+HUB_RE = re.compile(keyword_alternation(HUB_LOCATIONS))
+SERIES_AB_RE = re.compile(keyword_alternation(SERIES_AB_KEYWORDS))
+SERIES_CX_RE = re.compile(keyword_alternation(SERIES_CX_KEYWORDS))
+
+
+def calculate_scores_df(df):
+    """
+    Score every lead in a DataFrame at once.
+    
+    Each signal is a single regex pass over a whole column instead of a
+    Python loop per lead.
+    """
+    def text(col):
+        if col not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[col].fillna("").astype(str).str.lower()
+    
+    publication = text("recent_publication")
+    title = text("title")
+    funding = text("funding_status")
+    location = text("location") + " " + text("hq_location")
+    
+    series_ab = funding.str.contains(SERIES_AB_RE)
+    series_cx = funding.str.contains(SERIES_CX_RE)
+    
+    if "uses_invitro" in df.columns:
+        uses_invitro = df["uses_invitro"].notna() & df["uses_invitro"].astype(bool)
     else:
-        return "❄️ Cold"
+        uses_invitro = pd.Series(False, index=df.index)
+    
+    score = (
+        40 * publication.str.contains(SCIENTIFIC_RE)
+        + 30 * title.str.contains(ROLE_RE)
+        + (15 * series_cx).mask(series_ab, 20)
+        + 15 * uses_invitro
+        + 10 * location.str.contains(HUB_RE)
+    )
+    return score.clip(upper=100)
+
+
+def score_leads_df(df):
+    """
+    Probability score per lead.
+    
+    Uses a lead's own probability_score if present, else the sum of its
+    score breakdown (sample data), else the scoring model.
+    """
+    scores = calculate_scores_df(df)
+    
+    if "scores" in df.columns:
+        has_breakdown = df["scores"].notna()
+        breakdown_totals = df.loc[has_breakdown, "scores"].map(lambda s: sum(s.values()))
+        scores = breakdown_totals.reindex(df.index).fillna(scores)
+    
+    if "probability_score" in df.columns:
+        scores = df["probability_score"].fillna(scores)
+    
+    return scores.astype(int)
+
+
+def build_search_text(df):
+    """Lowercased text of every column, one string per row, for the search box."""
+    text = pd.Series("", index=df.index)
+    for col in df.columns:
+        text = text + " " + df[col].astype(str).where(df[col].notna(), "")
+    return text.str.lower()
+
+
+# Score tiers as bins, for labelling a whole column with pd.cut: Cold
+# below 20, then Low, Medium and High Priority in steps of 20, Hot from 80.
+# Bins are right-inclusive; the top one is open because sample-data
+# breakdown totals can exceed 100
+TIER_BINS = [-1, 19, 39, 59, 79, float("inf")]
+TIER_LABELS = ["❄️ Cold", "📉 Low", "📊 Medium", "⭐ High Priority", "🔥 Hot Lead"]
+
+# Coarser tiers for the breakdown chart
+BREAKDOWN_BINS = [-1, 39, 59, 79, float("inf")]
+BREAKDOWN_LABELS = ["Low (<40)", "Medium (40-59)", "High (60-79)", "Hot (80+)"]
+
+
+def score_tiers(scores):
+    """Tier label per score, for a whole Series in one pass."""
+    return pd.cut(scores, bins=TIER_BINS, labels=TIER_LABELS)
+
+
+# === CHARTS ===
+# Figures are cached on the data they plot, so reruns that leave the
+# filtered leads unchanged reuse them instead of rebuilding the plots
+
+
+@st.cache_data(ttl=3600, max_entries=32)
+def make_hist(df):
+    """Histogram of probability scores."""
+    fig = px.histogram(df, x="probability_score", nbins=20, color_discrete_sequence=["#667eea"], title="Score Distribution")
+    fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0")
+    return fig
+
+
+@st.cache_data(ttl=3600, max_entries=32)
+def make_pie(scores):
+    """Pie chart of leads per score tier."""
+    # Largest tier first, ties going to the higher tier
+    tier_counts = pd.cut(scores, bins=BREAKDOWN_BINS, labels=BREAKDOWN_LABELS).value_counts(sort=False)[::-1]
+    tier_counts = tier_counts[tier_counts > 0].sort_values(ascending=False, kind="stable")
+    
+    fig = px.pie(values=tier_counts.values, names=tier_counts.index, title="Lead Tier Breakdown",
+                 color_discrete_sequence=["#f43f5e", "#f59e0b", "#3b82f6", "#6b7280"])
+    fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0")
+    return fig
 
 
+@st.cache_data(ttl=3600, max_entries=32)
+def make_type_bar(df):
+    """Bar chart of average score per company type."""
+    type_scores = df.groupby("company_type", observed=True)["probability_score"].mean().sort_values(ascending=True)
+    fig = px.bar(x=type_scores.values, y=type_scores.index, orientation='h',
+                 color=type_scores.values, color_continuous_scale=["#6b7280", "#667eea", "#f43f5e"],
+                 title="Average Score by Company Type")
+    fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0", showlegend=False)
+    return fig
+
+
+@st.cache_data(ttl=3600, max_entries=32)
+def make_source_bar(sources):
+    """Bar chart of lead counts per data source."""
+    source_counts = sources.value_counts()
+    source_counts = source_counts[source_counts > 0]
+    fig = px.bar(x=source_counts.values, y=source_counts.index, orientation='h',
+                 color_discrete_sequence=["#764ba2"], title="Leads by Data Source")
+    fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0")
+    return fig
+
+
+# Columns written to the Excel export, in order
+EXPORT_COLUMNS = ["rank", "probability_score", "name", "title", "company", "location", "hq_location", "funding_status", "recent_publication", "source"]
+
+
+def export_columns(df):
+    """The frame's export columns, so the cached export hashes only plain values."""
+    return df[[col for col in EXPORT_COLUMNS if col in df.columns]]
+
+
+@st.cache_data(ttl=3600, max_entries=32)
 def generate_excel_export(df):
     """Generate formatted Excel file for export."""
     from openpyxl import Workbook
@@ -417,13 +442,11 @@ def generate_excel_export(df):
     from openpyxl.utils.dataframe import dataframe_to_rows
     
     # Prepare export dataframe with proper columns
-    export_cols = ["rank", "probability_score", "name", "title", "company", "location", "hq_location", "funding_status", "recent_publication", "source"]
-    available_cols = [col for col in export_cols if col in df.columns]
-    export_df = df[available_cols].copy()
+    export_df = export_columns(df).copy()
     
     # Add Tier column
     if "probability_score" in export_df.columns:
-        export_df.insert(1, "tier", export_df["probability_score"].apply(get_score_tier))
+        export_df.insert(1, "tier", score_tiers(export_df["probability_score"]))
     
     # Rename columns to proper display names
     column_names = {
@@ -550,6 +573,35 @@ def generate_excel_export(df):
     return output.getvalue()
 
 
+# Low-cardinality text columns, stored as pandas categories (integer codes
+# plus one copy of each distinct value)
+CATEGORY_COLUMNS = ("company_type", "source", "funding_status")
+
+
+@st.cache_data(ttl=3600)
+def score_and_rank(data_source, _leads_raw):
+    """Score, sort and rank the leads loaded for a data source."""
+    # One lead per person, across sources (first occurrence wins)
+    df = pd.DataFrame(_leads_raw).drop_duplicates(subset="name", ignore_index=True)
+    df["probability_score"] = score_leads_df(df)
+    
+    # Sort and rank (stable, so tied leads keep their fetch order)
+    df = df.sort_values("probability_score", ascending=False, kind="stable", ignore_index=True)
+    df["rank"] = range(1, len(df) + 1)
+    
+    # Compact dtypes: scores and ranks in the smallest integer type that
+    # holds them, repeated labels as categories
+    df["probability_score"] = pd.to_numeric(df["probability_score"], downcast="integer")
+    df["rank"] = pd.to_numeric(df["rank"], downcast="integer")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    
+    df["_search_text"] = build_search_text(df)
+    
+    return df
+
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🧬 3D In-Vitro Lead Qualification Dashboard</h1>', unsafe_allow_html=True)
@@ -583,6 +635,16 @@ def main():
             step=5
         )
         
+        # Table row cap: only the top-ranked rows are sent to the browser
+        n_rows = st.number_input(
+            "📋 Rows to Display",
+            min_value=50,
+            max_value=1000,
+            value=200,
+            step=50,
+            help="Top-ranked leads shown in the table (metrics, charts and export use all)"
+        )
+        
         st.markdown("---")
         st.markdown("### 📈 Scoring Model")
         st.markdown("""
@@ -595,42 +657,35 @@ def main():
         | Location | +10 |
         """)
     
-    # Load data based on selection
+    # Load data based on selection. A Refresh click skips the on-disk HTTP
+    # cache for the next run only; the flag is consumed whatever the source
+    refresh = st.session_state.pop("refresh_live_data", False)
+    live_fetched = False
     if "Live" in data_source:
         with st.spinner("🔄 Fetching live data from PubMed & NIH..."):
-            pubmed_leads = fetch_pubmed_leads(30)
-            nih_leads = fetch_nih_grants_leads(20)
-            leads_raw = pubmed_leads + nih_leads
+            pubmed_leads, nih_leads = fetch_all_leads_parallel(30, 20, refresh)
+            leads_raw = {field: pubmed_leads[field] + nih_leads[field] for field in LEAD_FIELDS}
+            live_fetched = bool(leads_raw["name"])
             
-            if not leads_raw:
+            if not live_fetched:
                 st.warning("No live data fetched. Using sample data.")
                 leads_raw = load_sample_leads()
-            else:
-                st.success(f"✅ Fetched {len(pubmed_leads)} from PubMed, {len(nih_leads)} from NIH")
     else:
         leads_raw = load_sample_leads()
     
-    # Calculate scores
-    for lead in leads_raw:
-        if "probability_score" not in lead:
-            if "scores" in lead:
-                lead["probability_score"] = sum(lead["scores"].values())
-            else:
-                lead["probability_score"] = calculate_score(lead)
-    
-    # Sort and rank
-    leads_raw.sort(key=lambda x: x["probability_score"], reverse=True)
-    for i, lead in enumerate(leads_raw, 1):
-        lead["rank"] = i
+    # Scored once per data source, not on every rerun
+    df = score_and_rank(data_source, leads_raw)
     
-    # Create DataFrame
-    df = pd.DataFrame(leads_raw)
+    if live_fetched:
+        # Counted after cross-source deduplication
+        fetched = df["source"].value_counts()
+        st.success(f"✅ Fetched {fetched.get('PubMed', 0)} from PubMed, {fetched.get('NIH RePORTER', 0)} from NIH")
     
     # Apply filters
     filtered_df = df.copy()
     
     if search_term:
-        mask = filtered_df.apply(lambda row: search_term.lower() in str(row).lower(), axis=1)
+        mask = filtered_df["_search_text"].str.contains(search_term.lower(), regex=False)
         filtered_df = filtered_df[mask]
     
     filtered_df = filtered_df[filtered_df["probability_score"] >= min_score]
@@ -639,39 +694,19 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{len(filtered_df)}</div>
-            <div class="metric-label">Total Leads</div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(METRIC_CARD_HTML.format(value=len(filtered_df), label="Total Leads"), unsafe_allow_html=True)
     
     with col2:
-        hot_leads = len(filtered_df[filtered_df["probability_score"] >= 80])
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{hot_leads}</div>
-            <div class="metric-label">Hot Leads 🔥</div>
-        </div>
-        """, unsafe_allow_html=True)
+        hot_leads = int((filtered_df["probability_score"] >= 80).sum())
+        st.markdown(METRIC_CARD_HTML.format(value=hot_leads, label="Hot Leads 🔥"), unsafe_allow_html=True)
     
     with col3:
         avg_score = filtered_df["probability_score"].mean() if len(filtered_df) > 0 else 0
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{avg_score:.0f}</div>
-            <div class="metric-label">Avg Score</div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(METRIC_CARD_HTML.format(value=f"{avg_score:.0f}", label="Avg Score"), unsafe_allow_html=True)
     
     with col4:
         sources = filtered_df["source"].nunique() if "source" in filtered_df.columns else 1
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{sources}</div>
-            <div class="metric-label">Data Sources</div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(METRIC_CARD_HTML.format(value=sources, label="Data Sources"), unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -681,7 +716,7 @@ def main():
     with tab1:
         col1, col2, col3 = st.columns([1, 1, 4])
         with col1:
-            excel_data = generate_excel_export(filtered_df)
+            excel_data = generate_excel_export(export_columns(filtered_df))
             st.download_button(
                 "📥 Download Excel",
                 excel_data,
@@ -690,7 +725,11 @@ def main():
             )
         with col2:
             if st.button("🔄 Refresh"):
-                st.cache_data.clear()
+                # Only the cached fetches and the ranking built from them
+                fetch_pubmed_leads.clear()
+                fetch_nih_grants_leads.clear()
+                score_and_rank.clear()
+                st.session_state["refresh_live_data"] = True
                 st.rerun()
         
         # Prepare display
@@ -704,14 +743,17 @@ def main():
             "location": "Location", "hq_location": "HQ", "source": "Source"
         })
         
-        display_df["Tier"] = display_df["Probability"].apply(get_score_tier)
+        display_df["Tier"] = score_tiers(display_df["Probability"])
         
         cols_order = ["Rank", "Tier", "Probability", "Name", "Title", "Company", "Location", "HQ", "Source"]
         cols_order = [c for c in cols_order if c in display_df.columns]
         display_df = display_df[cols_order]
         
+        if len(display_df) > n_rows:
+            st.caption(f"Showing the top {n_rows} of {len(display_df)} leads")
+        
         st.dataframe(
-            display_df,
+            display_df.head(n_rows),
             use_container_width=True,
             height=500,
             column_config={
@@ -723,39 +765,21 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_hist = px.histogram(filtered_df, x="probability_score", nbins=20, color_discrete_sequence=["#667eea"], title="Score Distribution")
-            fig_hist.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0")
-            st.plotly_chart(fig_hist, use_container_width=True)
+            st.plotly_chart(make_hist(filtered_df[["probability_score"]]), use_container_width=True)
         
         with col2:
-            tier_counts = filtered_df["probability_score"].apply(
-                lambda x: "Hot (80+)" if x >= 80 else "High (60-79)" if x >= 60 else "Medium (40-59)" if x >= 40 else "Low (<40)"
-            ).value_counts()
-            
-            fig_pie = px.pie(values=tier_counts.values, names=tier_counts.index, title="Lead Tier Breakdown",
-                            color_discrete_sequence=["#f43f5e", "#f59e0b", "#3b82f6", "#6b7280"])
-            fig_pie.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0")
-            st.plotly_chart(fig_pie, use_container_width=True)
+            st.plotly_chart(make_pie(filtered_df["probability_score"]), use_container_width=True)
     
     with tab3:
         col1, col2 = st.columns(2)
         
         with col1:
             if "company_type" in filtered_df.columns:
-                type_scores = filtered_df.groupby("company_type")["probability_score"].mean().sort_values(ascending=True)
-                fig_bar = px.bar(x=type_scores.values, y=type_scores.index, orientation='h',
-                               color=type_scores.values, color_continuous_scale=["#6b7280", "#667eea", "#f43f5e"],
-                               title="Average Score by Company Type")
-                fig_bar.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0", showlegend=False)
-                st.plotly_chart(fig_bar, use_container_width=True)
+                st.plotly_chart(make_type_bar(filtered_df[["company_type", "probability_score"]]), use_container_width=True)
         
         with col2:
             if "source" in filtered_df.columns:
-                source_counts = filtered_df["source"].value_counts()
-                fig_source = px.bar(x=source_counts.values, y=source_counts.index, orientation='h',
-                                   color_discrete_sequence=["#764ba2"], title="Leads by Data Source")
-                fig_source.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#e2e8f0")
-                st.plotly_chart(fig_source, use_container_width=True)
+                st.plotly_chart(make_source_bar(filtered_df["source"]), use_container_width=True)
     
     # Footer
     st.markdown("---")